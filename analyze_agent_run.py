@@ -1,12 +1,85 @@
 import os
 import re
-import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Optional
 import base64
+import hashlib
+import struct
+import tempfile
 from PIL import Image
 import io
+import orjson
+
+# Patterns are compiled once at import time and shared by every analyzer instance
+_LOG_NAME_RE = re.compile(r'agent_run_(.*?)\.log')
+_UNSAFE_CHARS_RE = re.compile(r'[^a-zA-Z0-9_-]')
+_EVAL_RE = re.compile(r'([👍👎🤷]) Eval: (.*)')
+_GOAL_RE = re.compile(r'🎯 Next goal: (.*)')
+_ACTION_RE = re.compile(r'🛠️  Action \d+/\d+: (.*)')
+
+# Encoded screenshots are cached as .b64 sidecar files so re-analyzing a log skips the resize/encode.
+# Stale entries are never evicted; agent re-runs rewrite screenshots (new mtime, new key), so clear
+# this directory by hand when it grows too large.
+_SCREENSHOT_CACHE_DIR = Path("agent_screenshots") / ".cache"
+# Screenshots are re-encoded as JPEG, which is far smaller than PNG once base64-encoded for the LLM
+_SCREENSHOT_MEDIA_TYPE = "image/jpeg"
+_SCREENSHOT_MAX_SIZE = (800, 800)
+_SCREENSHOT_JPEG_QUALITY = 85
+_SCREENSHOT_RESAMPLE = Image.Resampling.BILINEAR
+# Part of the cache key; bump it when the encoding changes in a way the parameters above don't capture
+_SCREENSHOT_CACHE_VERSION = 1
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+_SEP = '-' * 80
+_STEP_TMPL = """
+Step {step_number}:
+Evaluation: {evaluation}
+Next Goal: {next_goal}
+Action: {action}
+""" + _SEP + "\n"
+
+
+def _read_cached_screenshot(cache_file: Path) -> Optional[str]:
+    """Return a cached base64 encoding, or None on a miss or an unusable sidecar"""
+    try:
+        data = cache_file.read_bytes().decode('ascii')
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        # The cache only saves time; a bad sidecar just means encoding the screenshot again
+        print(f"Ignoring unreadable screenshot cache {cache_file}: {e}")
+        return None
+    return data or None
+
+
+def _write_cached_screenshot(cache_file: Path, encoded: bytes):
+    """Store a base64 encoding as a sidecar, ignoring failures (read-only checkout, full disk, ...)"""
+    try:
+        # Write to a temp file and rename it into place, so an interrupted run can't leave a
+        # truncated sidecar behind under a key that would keep being hit
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_file.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(encoded)
+            os.replace(tmp_path, cache_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except Exception as e:
+        print(f"Warning: could not write screenshot cache {cache_file}: {e}")
+
+
+def _png_dimensions(image_path: str) -> Optional[tuple[int, int]]:
+    """Read (width, height) from the PNG IHDR chunk without decoding the image"""
+    with open(image_path, 'rb') as f:
+        header = f.read(24)
+    if len(header) < 24 or header[:8] != _PNG_SIGNATURE or header[12:16] != b'IHDR':
+        return None
+    return struct.unpack('>II', header[16:24])
+
 
 class AgentRunAnalyzer:
     def __init__(self, log_file: str):
@@ -18,89 +91,142 @@ class AgentRunAnalyzer:
 
     def _get_screenshot_dir(self) -> str:
         # Extract task name from log filename
-        match = re.search(r'agent_run_(.*?)\.log', self.log_file)
+        match = _LOG_NAME_RE.search(self.log_file)
         if match:
             task_name = match.group(1)
             # Create a directory name that's safe for filesystem
-            safe_task_name = re.sub(r'[^a-zA-Z0-9_-]', '_', task_name)
+            safe_task_name = _UNSAFE_CHARS_RE.sub('_', task_name)
             return f"agent_screenshots/agent_screenshots_{safe_task_name}"
         return ""
 
     def _parse_log(self):
-        with open(self.log_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Extract task
-        task_match = re.search(r'🚀 Starting task: (.*?)\n', content)
-        if task_match:
-            self.task = task_match.group(1)
-
-        # Extract steps
-        step_pattern = r'📍 Step (\d+)\n(.*?)(?=📍 Step \d+|$)'
-        steps = re.finditer(step_pattern, content, re.DOTALL)
-        
-        for step in steps:
-            step_num = int(step.group(1))
-            step_content = step.group(2)
-            
-            # Extract evaluation
-            eval_match = re.search(r'([👍👎🤷]) Eval: (.*?)\n', step_content)
-            evaluation = eval_match.group(2) if eval_match else "Unknown"
-            
-            # Extract next goal
-            goal_match = re.search(r'🎯 Next goal: (.*?)\n', step_content)
-            next_goal = goal_match.group(1) if goal_match else ""
-            
-            # Extract actions
-            action_match = re.search(r'🛠️  Action \d+/\d+: (.*?)\n', step_content)
-            action = action_match.group(1) if action_match else ""
-            
-            # Get screenshot path
-            screenshot_path = os.path.join(self.screenshot_dir, f"step_{step_num:03d}.png")
-            
-            self.steps.append({
-                "step_number": step_num,
-                "evaluation": evaluation,
-                "next_goal": next_goal,
-                "action": action,
-                "screenshot_path": screenshot_path if os.path.exists(screenshot_path) else None
-            })
+        # Walk the log line by line so the whole file never has to live in memory;
+        # a step is flushed once the next step marker (or EOF) is reached
+        current = None
+
+        # List the screenshot directory once instead of stat-ing a path per step
+        if self.screenshot_dir and os.path.isdir(self.screenshot_dir):
+            with os.scandir(self.screenshot_dir) as entries:
+                existing_screenshots = {entry.name for entry in entries}
+        else:
+            existing_screenshots = set()
+
+        with open(self.log_file, 'r', encoding='utf-8', buffering=1 << 20) as f:
+            for line in f:
+                line = line.rstrip('\n')
+
+                # Markers may follow a logger prefix, so look for them anywhere in the line
+                if '📍 Step ' in line:
+                    _, _, step_num = line.partition('📍 Step ')
+                    if step_num.isdecimal():
+                        self._flush_step(current, existing_screenshots)
+                        current = {
+                            "step_number": int(step_num),
+                            "evaluation": "Unknown",
+                            "next_goal": "",
+                            "action": "",
+                        }
+                        continue
+
+                # Extract task
+                if not self.task and '🚀 Starting task: ' in line:
+                    self.task = line.partition('🚀 Starting task: ')[2]
+                    continue
+
+                if current is None:
+                    continue
+
+                # Only the first evaluation/goal/action of each step is kept
+                if 'Eval:' in line and current["evaluation"] == "Unknown":
+                    eval_match = _EVAL_RE.search(line)
+                    if eval_match:
+                        current["evaluation"] = eval_match.group(2)
+                elif 'Next goal:' in line and not current["next_goal"]:
+                    goal_match = _GOAL_RE.search(line)
+                    if goal_match:
+                        current["next_goal"] = goal_match.group(1)
+                elif 'Action ' in line and not current["action"]:
+                    action_match = _ACTION_RE.search(line)
+                    if action_match:
+                        current["action"] = action_match.group(1)
+
+        self._flush_step(current, existing_screenshots)
+
+    def _flush_step(self, step: Optional[Dict], existing_screenshots: set):
+        if step is None:
+            return
+
+        # Get screenshot path
+        screenshot_name = f"step_{step['step_number']:03d}.png"
+        if screenshot_name in existing_screenshots:
+            step["screenshot_path"] = os.path.join(self.screenshot_dir, screenshot_name)
+        else:
+            step["screenshot_path"] = None
+        self.steps.append(step)
 
     def _encode_screenshot(self, image_path: str) -> Optional[Dict]:
         try:
-            with Image.open(image_path) as img:
-                # Resize image if too large
-                max_size = (800, 800)
-                img.thumbnail(max_size, Image.Resampling.LANCZOS)
-                
-                # Convert to bytes
-                img_byte_arr = io.BytesIO()
-                img.save(img_byte_arr, format='PNG')
-                img_byte_arr = img_byte_arr.getvalue()
-                
-                # Encode to base64
-                base64_data = base64.b64encode(img_byte_arr).decode('utf-8')
-                
+            # Screenshots that already fit the thumbnail box are sent as-is, skipping PIL entirely
+            dimensions = _png_dimensions(image_path)
+            if dimensions and dimensions[0] <= _SCREENSHOT_MAX_SIZE[0] and dimensions[1] <= _SCREENSHOT_MAX_SIZE[1]:
                 return {
                     "type": "image",
                     "source": {
                         "type": "base64",
                         "media_type": "image/png",
-                        "data": base64_data
+                        "data": base64.b64encode(Path(image_path).read_bytes()).decode('ascii')
                     }
                 }
+
+            # Key the cache on path, mtime and size so a rewritten screenshot is re-encoded, and on the
+            # encoding parameters so changing them doesn't keep serving old thumbnails
+            stat = os.stat(image_path)
+            key = hashlib.blake2b(
+                (
+                    f"{os.path.abspath(image_path)}:{stat.st_mtime_ns}:{stat.st_size}:{_SCREENSHOT_MEDIA_TYPE}:"
+                    f"{_SCREENSHOT_MAX_SIZE}:{_SCREENSHOT_JPEG_QUALITY}:{_SCREENSHOT_RESAMPLE.name}:{_SCREENSHOT_CACHE_VERSION}"
+                ).encode(),
+                digest_size=16,
+            ).hexdigest()
+            cache_file = _SCREENSHOT_CACHE_DIR / f"{key}.b64"
+
+            base64_data = _read_cached_screenshot(cache_file)
+            if base64_data is None:
+                with Image.open(image_path) as img:
+                    # Resize image if too large; the LLM doesn't need Lanczos fidelity at this size.
+                    # draft() lets decoders that support it (JPEG) subsample while decoding.
+                    max_size = _SCREENSHOT_MAX_SIZE
+                    img.draft('RGB', (max_size[0] * 2, max_size[1] * 2))
+                    img.thumbnail(max_size, _SCREENSHOT_RESAMPLE)
+
+                    # Convert to bytes
+                    img_byte_arr = io.BytesIO()
+                    img.convert('RGB').save(img_byte_arr, format='JPEG', quality=_SCREENSHOT_JPEG_QUALITY, optimize=False)
+
+                # Encode to base64 straight from the buffer instead of copying it out with getvalue()
+                encoded = base64.b64encode(img_byte_arr.getbuffer())
+                _write_cached_screenshot(cache_file, encoded)
+                base64_data = encoded.decode('ascii')
+
+            return {
+                "type": "image",
+                "source": {
+                    "type": "base64",
+                    "media_type": _SCREENSHOT_MEDIA_TYPE,
+                    "data": base64_data
+                }
+            }
         except Exception as e:
             print(f"Error encoding screenshot {image_path}: {e}")
             return None
 
     def generate_analysis_prompt(self) -> List[Dict]:
-        # Start with the task description
-        messages = [{
-            "role": "user",
-            "content": [
-                {
-                    "type": "text",
-                    "text": f"""Task: {self.task}
+        # Everything goes into a single user message as a flat [text, image, text, ...] content list,
+        # starting with the task description
+        content = [
+            {
+                "type": "text",
+                "text": f"""Task: {self.task}
 
 You are a specialized web application bug detection agent. Your task is to analyze agent-website interaction trajectories and identify potential bugs, glitches, and usability issues in the target website.
 IMPORTANT: Focus on website malfunctions, NOT agent errors. Distinguish between agent mistakes and actual website problems. A small note:  the web browser is lauched from an automated browser, so it is not always the website that is causing the issue.
@@ -121,44 +247,32 @@ Please analyze the entire sequence of steps and identify:
 Here's the step-by-step trajectory:
 
 """
-                }
-            ]
-        }]
+            }
+        ]
+
+        # Encode all screenshots up front in parallel; PIL and base64 release the GIL while working
+        screenshot_paths = [step['screenshot_path'] for step in self.steps if step['screenshot_path']]
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            encoded_screenshots = dict(zip(screenshot_paths, executor.map(self._encode_screenshot, screenshot_paths)))
 
         # Add each step with its screenshot and information
         for step in self.steps:
-            step_content = []
-            
             # Add screenshot if available
             if step['screenshot_path']:
-                screenshot_data = self._encode_screenshot(step['screenshot_path'])
+                screenshot_data = encoded_screenshots[step['screenshot_path']]
                 if screenshot_data:
-                    step_content.append(screenshot_data)
+                    content.append(screenshot_data)
             
             # Add step information
-            step_text = f"""
-Step {step['step_number']}:
-Evaluation: {step['evaluation']}
-Next Goal: {step['next_goal']}
-Action: {step['action']}
-{'-' * 80}
-"""
-            step_content.append({
+            content.append({
                 "type": "text",
-                "text": step_text
-            })
-            
-            messages.append({
-                "role": "user",
-                "content": step_content
+                "text": _STEP_TMPL.format_map(step)
             })
 
         # Add the final analysis request
-        messages.append({
-            "role": "user",
-            "content": [{
-                "type": "text",
-                "text": """
+        content.append({
+            "type": "text",
+            "text": """
 Based on the above trajectory, please provide:
 1. A summary of any bugs or glitches identified
 2. The specific steps where issues occurred
@@ -172,10 +286,12 @@ For each identified issue, please specify:
 - The severity of the issue
 - The expected behavior vs actual behavior
 """
-            }]
         })
 
-        return messages
+        return [{
+            "role": "user",
+            "content": content
+        }]
 
 def analyze_agent_run(log_file: str) -> List[Dict]:
     analyzer = AgentRunAnalyzer(log_file)
@@ -188,8 +304,7 @@ if __name__ == "__main__":
     
     # Save the messages to a file for inspection
     output_file = "analysis_messages.json"
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(messages, f, indent=2)
+    Path(output_file).write_bytes(orjson.dumps(messages, option=orjson.OPT_INDENT_2))
     
     print(f"Analysis messages have been generated and saved to {output_file}")
     print("You can now feed these messages to the Anthropic API for analysis.") 
\ No newline at end of file
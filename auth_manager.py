@@ -1,15 +1,39 @@
 import os
 import time
-import json
+import base64
+import functools
 import logging
 from typing import Dict, Optional
 from pathlib import Path
 import keyring
+import orjson
 from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from browser_use.browser.context import BrowserContext
 
 logger = logging.getLogger(__name__)
 
+# Auth files are framed as version byte + nonce + AES-GCM ciphertext.
+# Files without the version byte are legacy Fernet tokens (which always start with b"gAAAAA").
+_AUTH_FORMAT_AESGCM = b"\x01"
+_NONCE_SIZE = 12
+
+@functools.lru_cache(maxsize=None)
+def _load_key(key_file: Path) -> bytes:
+    """Get or create the encryption key in key_file, reading each key file once per process.
+
+    Pass an absolute path: the cache is keyed on it, so a relative path would go stale
+    if the working directory changed.
+    """
+    # The key file holds 32 random bytes, urlsafe-base64 encoded so that it stays a valid
+    # Fernet key for reading legacy auth files
+    if key_file.exists():
+        return key_file.read_bytes()
+    else:
+        key = base64.urlsafe_b64encode(AESGCM.generate_key(bit_length=256))
+        key_file.write_bytes(key)
+        return key
+
 class SecureAuthManager:
     def __init__(self, profile_name: str = "test_profile"):
         self.profile_name = profile_name
@@ -19,20 +43,44 @@ class SecureAuthManager:
         # Use keyring for secure credential storage
         self.service_name = f"browser_use_{profile_name}"
         
+        # AES-GCM cipher, built lazily from the key file on first use
+        self._cipher: Optional[AESGCM] = None
+        # Credentials already read from the keyring, keyed by site
+        self._cred_cache: dict[str, tuple[str, str]] = {}
+        
     def store_test_credentials(self, site: str, username: str, password: str):
         """Securely store test account credentials"""
         keyring.set_password(self.service_name, f"{site}_user", username)
         keyring.set_password(self.service_name, f"{site}_pass", password)
+        self.reset_credentials(site)
         logger.info(f"Stored credentials for {site}")
     
+    def store_test_credentials_bulk(self, credentials: dict[str, tuple[str, str]]):
+        """Securely store several test accounts at once, mapping site -> (username, password)"""
+        # Resolve the keyring backend once instead of per call
+        backend = keyring.get_keyring()
+        for site, (username, password) in credentials.items():
+            backend.set_password(self.service_name, f"{site}_user", username)
+            backend.set_password(self.service_name, f"{site}_pass", password)
+            self.reset_credentials(site)
+        logger.info(f"Stored credentials for {', '.join(credentials)}")
+    
     def get_credentials(self, site: str) -> tuple[str, str]:
         """Retrieve test account credentials"""
+        if site in self._cred_cache:
+            return self._cred_cache[site]
+        
         username = keyring.get_password(self.service_name, f"{site}_user")
         password = keyring.get_password(self.service_name, f"{site}_pass")
         if not username or not password:
             raise ValueError(f"No credentials found for {site}")
+        self._cred_cache[site] = (username, password)
         return username, password
     
+    def reset_credentials(self, site: str):
+        """Drop cached credentials for a site so the next lookup goes back to the keyring"""
+        self._cred_cache.pop(site, None)
+    
     async def save_auth_state(self, context: BrowserContext, site: str):
         """Save authentication state after successful login"""
         auth_file = self.auth_dir / f"{site}_auth.json"
@@ -47,11 +95,10 @@ class SecureAuthManager:
         }
         
         # Encrypt the data
-        key = self._get_or_create_key()
-        fernet = Fernet(key)
-        encrypted = fernet.encrypt(json.dumps(auth_data).encode())
+        nonce = os.urandom(_NONCE_SIZE)
+        encrypted = self._cipher_obj().encrypt(nonce, orjson.dumps(auth_data), None)
         
-        auth_file.write_bytes(encrypted)
+        auth_file.write_bytes(_AUTH_FORMAT_AESGCM + nonce + encrypted)
         logger.info(f"Saved auth state for {site}")
     
     async def load_auth_state(self, context: BrowserContext, site: str) -> bool:
@@ -63,10 +110,8 @@ class SecureAuthManager:
         
         try:
             # Decrypt the data
-            key = self._get_or_create_key()
-            fernet = Fernet(key)
             encrypted = auth_file.read_bytes()
-            auth_data = json.loads(fernet.decrypt(encrypted).decode())
+            auth_data = orjson.loads(self._decrypt(encrypted))
             print(f"Auth data: {auth_data}")
             
             # Check if auth is still fresh (e.g., less than 7 days old)
@@ -83,12 +128,19 @@ class SecureAuthManager:
             logger.error(f"Failed to load auth state: {e}")
             return False
     
+    def _cipher_obj(self) -> AESGCM:
+        """Get the AES-GCM cipher, reading the key file only on first use"""
+        if self._cipher is None:
+            self._cipher = AESGCM(base64.urlsafe_b64decode(self._get_or_create_key()))
+        return self._cipher
+    
+    def _decrypt(self, encrypted: bytes) -> bytes:
+        """Decrypt an auth file written in either the AES-GCM or the legacy Fernet format"""
+        if encrypted[:1] == _AUTH_FORMAT_AESGCM:
+            nonce = encrypted[1:1 + _NONCE_SIZE]
+            return self._cipher_obj().decrypt(nonce, encrypted[1 + _NONCE_SIZE:], None)
+        return Fernet(self._get_or_create_key()).decrypt(encrypted)
+    
     def _get_or_create_key(self) -> bytes:
         """Get or create encryption key"""
-        key_file = self.auth_dir / ".key"
-        if key_file.exists():
-            return key_file.read_bytes()
-        else:
-            key = Fernet.generate_key()
-            key_file.write_bytes(key)
-            return key
\ No newline at end of file
+        return _load_key((self.auth_dir / ".key").resolve())
\ No newline at end of file
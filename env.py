@@ -0,0 +1,12 @@
+# env.py
+from dotenv import load_dotenv
+
+_LOADED = False
+
+def ensure_env():
+    """Load .env into os.environ once per process; existing environment variables are not overridden"""
+    global _LOADED
+    if _LOADED:
+        return
+    load_dotenv(override=False)
+    _LOADED = True
@@ -1,47 +1,167 @@
 import os
-from dotenv import load_dotenv
-from anthropic import Anthropic
+import asyncio
+import argparse
+import orjson
+from typing import Optional
+from env import ensure_env
+from anthropic import AsyncAnthropic
 from analyze_agent_run import analyze_agent_run
 
-def generate_bug_report(log_file: str) -> str:
+REPORT_MODEL = "claude-3-7-sonnet-20250219"
+REPORT_MAX_TOKENS = 1024
+
+# Maximum number of bug reports requested from Claude at the same time
+MAX_CONCURRENT_REPORTS = 8
+
+# Seconds between status checks while a Message Batch is processing
+BATCH_POLL_INTERVAL = 30
+
+# Per-batch limits of the Message Batches API (100,000 requests or 256 MB); the size cap leaves
+# headroom for the request envelope
+MAX_BATCH_REQUESTS = 100_000
+MAX_BATCH_BYTES = 250 * 1024 * 1024
+
+async def generate_bug_report(log_file: str, client: Optional[AsyncAnthropic] = None) -> str:
     # Load environment variables
-    load_dotenv()
-    
+    ensure_env()
+
     # Initialize the Anthropic client
-    client = Anthropic()
-    
-    # Generate the analysis messages
-    messages = analyze_agent_run(log_file)
-    
+    if client is None:
+        client = AsyncAnthropic()
+
+    # Generate the analysis messages (file IO and image encoding, so keep it off the event loop)
+    messages = await asyncio.to_thread(analyze_agent_run, log_file)
+
     # Get the analysis from Claude
-    response = client.messages.create(
-        model="claude-3-7-sonnet-20250219",
-        max_tokens=1024,
+    response = await client.messages.create(
+        model=REPORT_MODEL,
+        max_tokens=REPORT_MAX_TOKENS,
         messages=messages
     )
-    
+
     return response.content[0].text
 
+def _write_report(output_file: str, bug_report: str):
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write(bug_report)
+
+async def _save_report(output_dir: str, log_file: str, bug_report: str):
+    # Create output filename based on log filename
+    output_filename = log_file.replace("agent_run_", "bug_report_").replace(".log", ".md")
+
+    # Save the bug report to a file
+    output_file = os.path.join(output_dir, output_filename)
+    await asyncio.to_thread(_write_report, output_file, bug_report)
+
+    print(f"Bug report has been generated and saved to {output_file}")
+
+async def generate_bug_reports(log_dir: str, log_files: list[str], output_dir: str = "bug_reports"):
+    """Generate bug reports for all log files concurrently, bounded by MAX_CONCURRENT_REPORTS"""
+    ensure_env()
+    client = AsyncAnthropic()
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REPORTS)
+    os.makedirs(output_dir, exist_ok=True)
+
+    async def generate_one(log_file: str):
+        log_path = os.path.join(log_dir, log_file)
+        # A failed report must not cancel the others still in flight
+        try:
+            async with semaphore:
+                bug_report = await generate_bug_report(log_path, client)
+            await _save_report(output_dir, log_file, bug_report)
+        except Exception as e:
+            print(f"Bug report for {log_file} failed: {e}")
+
+    await asyncio.gather(*(generate_one(log_file) for log_file in log_files))
+
+async def _submit_batch(client: AsyncAnthropic, requests: list[dict]):
+    # A rejected submission must not stop the batches already sent from being collected
+    try:
+        batch = await client.messages.batches.create(requests=requests)
+    except Exception as e:
+        print(f"Submitting a batch of {len(requests)} bug report requests failed: {e}")
+        return None
+    print(f"Submitted batch {batch.id} with {len(requests)} bug report requests")
+    return batch
+
+async def _collect_batch(client: AsyncAnthropic, batch, log_files: list[str], output_dir: str):
+    try:
+        while batch.processing_status != "ended":
+            await asyncio.sleep(BATCH_POLL_INTERVAL)
+            batch = await client.messages.batches.retrieve(batch.id)
+
+        async for entry in await client.messages.batches.results(batch.id):
+            log_file = log_files[int(entry.custom_id.removeprefix("report-"))]
+            # One failed or empty result must not stop the rest of the batch being saved
+            try:
+                if entry.result.type != "succeeded":
+                    print(f"Bug report for {log_file} failed: {entry.result.type}")
+                    continue
+                await _save_report(output_dir, log_file, entry.result.message.content[0].text)
+            except Exception as e:
+                print(f"Bug report for {log_file} failed: {e}")
+    except Exception as e:
+        print(f"Collecting batch {batch.id} failed, its results can still be retrieved later: {e}")
+
+async def generate_bug_reports_batch(log_dir: str, log_files: list[str], output_dir: str = "bug_reports"):
+    """Generate bug reports for all log files through Anthropic Message Batches.
+
+    The reports are independent, so they can be submitted together and collected once the batches
+    have ended, at batch pricing. Requests are split across as many batches as the per-batch count
+    and size limits require. Results can take a while to arrive, so use this for offline runs.
+    """
+    ensure_env()
+    client = AsyncAnthropic()
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Logs are analyzed a few at a time and each batch is submitted as soon as it is full, so only
+    # one batch's worth of encoded screenshots is held in memory
+    batches = []
+    chunk, chunk_bytes = [], 0
+    for start in range(0, len(log_files), MAX_CONCURRENT_REPORTS):
+        group = log_files[start:start + MAX_CONCURRENT_REPORTS]
+        all_messages = await asyncio.gather(
+            *(asyncio.to_thread(analyze_agent_run, os.path.join(log_dir, log_file)) for log_file in group),
+            return_exceptions=True,
+        )
+        for i, messages in enumerate(all_messages, start):
+            # An unreadable log is skipped rather than aborting the run and orphaning submitted batches
+            if isinstance(messages, Exception):
+                print(f"Bug report for {log_files[i]} failed: {messages}")
+                continue
+            # Log filenames contain spaces, which custom_id does not allow, so requests are keyed by index
+            request = {
+                "custom_id": f"report-{i}",
+                "params": {
+                    "model": REPORT_MODEL,
+                    "max_tokens": REPORT_MAX_TOKENS,
+                    "messages": messages,
+                },
+            }
+            # +1 for the separator between requests in the serialized list
+            size = len(orjson.dumps(request)) + 1
+            if chunk and (len(chunk) >= MAX_BATCH_REQUESTS or chunk_bytes + size > MAX_BATCH_BYTES):
+                batches.append(await _submit_batch(client, chunk))
+                chunk, chunk_bytes = [], 0
+            chunk.append(request)
+            chunk_bytes += size
+    if chunk:
+        batches.append(await _submit_batch(client, chunk))
+    batches = [batch for batch in batches if batch is not None]
+
+    await asyncio.gather(*(_collect_batch(client, batch, log_files, output_dir) for batch in batches))
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate bug reports from agent run logs")
+    parser.add_argument("--batch", action="store_true", help="Submit the reports as Anthropic Message Batches")
+    args = parser.parse_args()
 
     # Get all log files for Startup Website Testing tasks
     log_dir = "agent_logs"
     startup_logs = [f for f in os.listdir(log_dir) if f.startswith("agent_run_Ecommerce Testing")]
-    
+
     # Generate bug reports for each log file
-    for log_file in startup_logs:
-        log_path = os.path.join(log_dir, log_file)
-        bug_report = generate_bug_report(log_path)
-        
-        # Create output filename based on log filename
-        output_filename = log_file.replace("agent_run_", "bug_report_").replace(".log", ".md")
-        
-        # Save the bug report to a file
-        output_dir = "bug_reports"
-        os.makedirs(output_dir, exist_ok=True)
-        output_file = os.path.join(output_dir, output_filename)
-        
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(bug_report)
-        
-        print(f"Bug report has been generated and saved to {output_file}")
\ No newline at end of file
+    if args.batch:
+        asyncio.run(generate_bug_reports_batch(log_dir, startup_logs))
+    else:
+        asyncio.run(generate_bug_reports(log_dir, startup_logs))
@@ -0,0 +1,80 @@
+"""Config loading and LLM construction shared by main.py and test_llm_providers.py"""
+
+import functools
+import importlib
+import os
+
+import httpx
+import yaml
+from langchain_core.rate_limiters import InMemoryRateLimiter
+
+# Prefer the libyaml C loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+@functools.lru_cache(maxsize=1)
+def load_config(config_path='configs/config.yaml'):
+    """Read and parse the YAML config once; later calls reuse the parsed dict"""
+    with open(config_path, 'r') as f:
+        return yaml.load(f, Loader=_YamlLoader)
+
+# Supported LLM providers: name -> (module, chat model class, API key env var, display name).
+# Provider packages are imported on first use so only the configured one is ever loaded.
+_PROVIDERS = {
+    'anthropic': ('langchain_anthropic', 'ChatAnthropic', 'ANTHROPIC_API_KEY', 'Anthropic'),
+    'openai': ('langchain_openai', 'ChatOpenAI', 'OPENAI_API_KEY', 'OpenAI'),
+}
+_LLM_CLASSES = {}
+
+def _llm_class(provider):
+    """Import the chat model class for a provider, caching it for later calls"""
+    if provider not in _LLM_CLASSES:
+        module_name, class_name, _, _ = _PROVIDERS[provider]
+        _LLM_CLASSES[provider] = getattr(importlib.import_module(module_name), class_name)
+    return _LLM_CLASSES[provider]
+
+def create_llm(llm_config, max_concurrency=1, http_async_client=None):
+    """Create LLM instance based on provider configuration.
+
+    OpenAI models get a keep-alive pool sized for max_concurrency unless an existing
+    http_async_client is passed in to share.
+    """
+    provider = llm_config.get('provider', 'openai').lower()
+    if provider not in _PROVIDERS:
+        raise ValueError(f"Unsupported LLM provider: {provider}. Supported providers: 'anthropic', 'openai'")
+
+    # Check for the provider's API key
+    _, _, env_key, display_name = _PROVIDERS[provider]
+    if not os.getenv(env_key):
+        raise ValueError(f"{env_key} environment variable is required for {display_name} provider")
+
+    # LLM parameters. The provider SDKs retry rate-limited requests with jittered exponential
+    # backoff that honours Retry-After, so 429s are absorbed before they reach the agent.
+    llm_params = {
+        'model': llm_config['model'],
+        'temperature': llm_config.get('temperature', 0.0),
+        'max_retries': llm_config.get('max_retries', 5),
+    }
+    # Leave max_tokens unset rather than passing None so the model default applies
+    max_tokens = llm_config.get('max_tokens')
+    if max_tokens is not None:
+        llm_params['max_tokens'] = max_tokens
+
+    # Optional requests-per-minute cap shared by every agent using this LLM; together with the task
+    # semaphore this bounds both parallel tasks and request rate
+    rate_limit = os.getenv('LLM_RATE_LIMIT', llm_config.get('rate_limit'))
+    if rate_limit:
+        llm_params['rate_limiter'] = InMemoryRateLimiter(requests_per_second=float(rate_limit) / 60)
+
+    if provider == 'openai':
+        # One keep-alive pool shared by every agent using this LLM
+        # (langchain-anthropic already reuses a process-wide cached httpx client)
+        if http_async_client is None:
+            http_async_client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=max_concurrency * 2, max_keepalive_connections=max_concurrency * 2)
+            )
+        llm_params['http_async_client'] = http_async_client
+
+    return _llm_class(provider)(**llm_params)
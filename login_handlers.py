@@ -15,16 +15,18 @@ class LoginHandlers:
 
         try:
             await page.goto("https://accounts.google.com")
-            await page.wait_for_selector('input[type="email"]', timeout=10000)
+            email_input = page.locator('input[type="email"]').first
+            await email_input.wait_for(timeout=10000)
             
             # Enter email
-            await page.fill('input[type="email"]', username)
-            await page.click("#identifierNext")
+            await email_input.fill(username)
+            await page.locator("#identifierNext").click()
 
             # Wait for password field
-            await page.wait_for_selector('input[type="password"]', timeout=10000)
-            await page.fill('input[type="password"]', password)
-            await page.click("#passwordNext")
+            password_input = page.locator('input[type="password"]').first
+            await password_input.wait_for(timeout=10000)
+            await password_input.fill(password)
+            await page.locator("#passwordNext").click()
             
             # Wait for successful login
             await page.wait_for_load_state('networkidle',timeout=30000)
@@ -45,19 +47,21 @@ class LoginHandlers:
         
         try:
             await page.goto("https://www.amazon.com/ap/signin")
-            await page.wait_for_selector('input[name="email"]', timeout=10000)
+            email_input = page.locator('input[name="email"]').first
+            await email_input.wait_for(timeout=10000)
             
             # Enter email
-            await page.fill('input[name="email"]', username)
-            await page.click("#continue")
+            await email_input.fill(username)
+            await page.locator("#continue").click()
             
             # Enter password
-            await page.wait_for_selector('input[name="password"]', timeout=10000)
-            await page.fill('input[name="password"]', password)
-            await page.click("#signInSubmit")
+            password_input = page.locator('input[name="password"]').first
+            await password_input.wait_for(timeout=10000)
+            await password_input.fill(password)
+            await page.locator("#signInSubmit").click()
             
             # Wait for successful login
-            await page.wait_for_navigation(timeout=30000)
+            await page.wait_for_load_state('networkidle', timeout=30000)
             
             return True
             
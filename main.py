@@ -2,16 +2,15 @@
 from browser_use.agent.service import Agent
 from browser_use.browser.browser import Browser, BrowserConfig
 from browser_use.browser.context import BrowserContextConfig
-from langchain_anthropic import ChatAnthropic
-from langchain_openai import ChatOpenAI
 import asyncio
-from dotenv import load_dotenv
+from env import ensure_env
+from llm_factory import create_llm, load_config
 from auth_manager import SecureAuthManager
 from login_handlers import LoginHandlers
 from sacred import Experiment
 from sacred.observers import FileStorageObserver
-import yaml
 import os
+import sys
 
 # Initialize Sacred experiment
 ex = Experiment('browser-use')
@@ -21,8 +20,7 @@ ex = Experiment('browser-use')
 def config():
     # Load default configuration from YAML
     config_path = 'configs/config.yaml'
-    with open(config_path, 'r') as f:
-        config_data = yaml.safe_load(f)
+    config_data = load_config(config_path)
     
     # Define Sacred variables from config
     browser = config_data['browser']
@@ -38,6 +36,8 @@ class BrowserManager:
         self.context_config = context_config
         self.auth_manager_config = auth_manager_config
         self.auth_manager = SecureAuthManager(browser_config['test_profile_name'])
+        # Cookies of the logged-in shared context, captured once and copied into each task context
+        self._auth_cookies = None
 
     async def setup_authenticated_browser(self):
         """Set up browser with test account authentication"""
@@ -50,8 +50,17 @@ class BrowserManager:
             extra_browser_args=self.browser_config['extra_browser_args'],
         )
         
-        # Configure context with security settings
-        context_config = BrowserContextConfig(
+        browser = Browser(config=browser_config)
+        context = await browser.new_context(config=self._build_context_config())
+        
+        # Check if we need to login
+        if self.auth_manager_config['ensure_logged_in']:
+            await self.ensure_logged_in(context)
+        return browser, context
+
+    def _build_context_config(self):
+        """Configure context with security settings"""
+        return BrowserContextConfig(
             disable_security=self.context_config['disable_security'],
             cookies_file=self.context_config['cookies_file'],
             user_agent=self.context_config['user_agent'],
@@ -59,13 +68,20 @@ class BrowserManager:
             allowed_domains=self.context_config['allowed_domains'],
         )
 
-        browser = Browser(config=browser_config)
-        context = await browser.new_context(config=context_config)
-        
-        # Check if we need to login
+    async def new_task_context(self, browser, shared_context):
+        """Open a separate context on the shared browser for a task running alongside others.
+
+        All contexts run in the one Chromium instance; the new context starts from the shared
+        context's login cookies instead of re-reading and decrypting the saved auth state per task.
+        """
+        context = await browser.new_context(config=self._build_context_config())
         if self.auth_manager_config['ensure_logged_in']:
-            await self.ensure_logged_in(context)
-        return browser, context
+            if self._auth_cookies is None:
+                shared_session = await shared_context.get_session()
+                self._auth_cookies = await shared_session.context.cookies()
+            session = await context.get_session()
+            await session.context.add_cookies(self._auth_cookies)
+        return context
 
     async def ensure_logged_in(self, context):
         """Ensure we're logged into required services"""
@@ -85,44 +101,30 @@ class BrowserManager:
             else:
                 raise Exception("Failed to login to Google")
 
-def create_llm(llm_config):
-    """Create LLM instance based on provider configuration"""
-    provider = llm_config.get('provider', 'openai').lower()
-    model = llm_config['model']
-    
-    # Common LLM parameters
-    common_params = {
-        'temperature': llm_config.get('temperature', 0.0),
-        'max_tokens': llm_config.get('max_tokens', None),
-    }
-    
-    if provider == 'anthropic':
-        # Check for Anthropic API key
-        if not os.getenv('ANTHROPIC_API_KEY'):
-            raise ValueError("ANTHROPIC_API_KEY environment variable is required for Anthropic provider")
-        
-        anthropic_params = {
-            'model': model,
-            **common_params
-        }
-        return ChatAnthropic(**anthropic_params)
-    
-    elif provider == 'openai':
-        # Check for OpenAI API key
-        if not os.getenv('OPENAI_API_KEY'):
-            raise ValueError("OPENAI_API_KEY environment variable is required for OpenAI provider")
-        
-        openai_params = {
-            'model': model,
-            **common_params
-        }
-        return ChatOpenAI(**openai_params)
-    
-    else:
-        raise ValueError(f"Unsupported LLM provider: {provider}. Supported providers: 'anthropic', 'openai'")
+def _parse_tasks(path):
+    """Read (name, task) pairs from a tasks file.
+
+    Each line is "name: task"; blank lines and "#" comments are skipped. Tasks are keyed by name
+    (which also names the agent's log and screenshot dir), so a repeated name keeps the last task.
+    """
+    work = {}
+    with open(path, "r") as f:
+        lines = f.read().splitlines()
+    for raw in lines:
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        name, sep, task = line.partition(":")
+        if not sep:
+            print(f"Warning: Skipping malformed task line (expected 'name: task'): {line}")
+            continue
+        if name in work:
+            print(f"Warning: Duplicate task name '{name}', keeping the last entry")
+        work[name] = task
+    return list(work.items())
 
 async def run_tasks(browser_config, context_config, llm_config, tasks_file, agent_config, auth_manager_config):
-    load_dotenv()
+    ensure_env()
     
     print(f"=== Starting task execution session ===")
     
@@ -130,6 +132,28 @@ async def run_tasks(browser_config, context_config, llm_config, tasks_file, agen
     browser_context = None
     
     try:
+        # Tasks run concurrently up to max_concurrency; AGENT_CONCURRENCY overrides the config value
+        max_concurrency = os.getenv('AGENT_CONCURRENCY', agent_config.get('max_concurrency', 1))
+        try:
+            max_concurrency = int(max_concurrency)
+        except (TypeError, ValueError):
+            max_concurrency = 0
+        if max_concurrency < 1:
+            # Semaphore(0) would block every task forever; fail before anything starts
+            print("Error: AGENT_CONCURRENCY / agent.max_concurrency must be an integer >= 1")
+            sys.exit(1)
+
+        # Create a single LLM instance based on configuration; every task's agent shares it.
+        # This happens before the browser is launched so a missing or rejected API key fails fast.
+        try:
+            llm = create_llm(llm_config, max_concurrency)
+            await llm.ainvoke([{"role": "user", "content": "ping"}], max_tokens=1)
+        except Exception as e:
+            print(f"Error: LLM preflight check failed, not starting any tasks: {e}")
+            sys.exit(1)
+        provider = llm_config.get('provider', 'openai').upper()
+        print(f"Using {provider} provider with model: {llm_config['model']}")
+        
         # Set up browser manager
         browser_manager = BrowserManager(browser_config, context_config, auth_manager_config)
         
@@ -137,55 +161,83 @@ async def run_tasks(browser_config, context_config, llm_config, tasks_file, agen
         browser, browser_context = await browser_manager.setup_authenticated_browser()
         print("Browser and context initialized, ready to run tasks")
         
-        # Create LLM instance based on configuration
-        llm = create_llm(llm_config)
-        print(f"Using {llm_config.get('provider', 'openai').upper()} provider with model: {llm_config['model']}")
+        # Resolve agent settings once rather than per task
+        max_steps = agent_config['max_steps']
+        max_failures = agent_config.get('max_failures', 3)
+        retry_delay = agent_config.get('retry_delay', 10)
+        use_vision = agent_config.get('use_vision', True)
+        enable_memory = agent_config.get('enable_memory', True)
+        max_actions_per_step = agent_config.get('max_actions_per_step', 10)
+        save_auth_state = auth_manager_config.get('save_auth_state', False)
+        
+        semaphore = asyncio.Semaphore(max_concurrency)
         
         # Read tasks
-        task_count = 0
         print(f"Reading tasks from: {tasks_file}")
         
-        with open(tasks_file, "r") as f:
-            tasks = [line.strip() for line in f if line.strip()]
-            print(f"Found {len(tasks)} tasks to process")
-            
-            for line in tasks:
-                task_count += 1
-                name, task = line.split(":", 1)
+        tasks = _parse_tasks(tasks_file)
+        print(f"Found {len(tasks)} tasks to process (max {max_concurrency} at a time)")
+        
+        async def run_one(task_count, name, task):
+            async with semaphore:
                 print(f"[{task_count}/{len(tasks)}] Running task: {name} - {task.strip()}")
                 
-                # Create agent with authenticated browser and dynamic LLM
-                agent = Agent(
-                    task=task,
-                    llm=llm,
-                    task_name=name,
-                    browser=browser,
-                    browser_context=browser_context,
-                    # Agent configuration from YAML
-                    max_failures=agent_config.get('max_failures', 3),
-                    retry_delay=agent_config.get('retry_delay', 10),
-                    use_vision=agent_config.get('use_vision', True),
-                    enable_memory=agent_config.get('enable_memory', True),
-                    max_actions_per_step=agent_config.get('max_actions_per_step', 10)
-                )
-                
+                # browser_use tracks a single current page per context, so only a lone task
+                # can drive the shared authenticated context; concurrent tasks get their own
+                task_context = None
+                agent = None
+                succeeded = False
                 try:
-                    await agent.run(max_steps=agent_config['max_steps'])
+                    if max_concurrency == 1:
+                        task_context = browser_context
+                    else:
+                        task_context = await browser_manager.new_task_context(browser, browser_context)
+                    
+                    # Create agent with authenticated browser and dynamic LLM
+                    agent = Agent(
+                        task=task,
+                        llm=llm,
+                        task_name=name,
+                        browser=browser,
+                        browser_context=task_context,
+                        # Agent configuration from YAML
+                        max_failures=max_failures,
+                        retry_delay=retry_delay,
+                        use_vision=use_vision,
+                        enable_memory=enable_memory,
+                        max_actions_per_step=max_actions_per_step
+                    )
+                    await agent.run(max_steps=max_steps)
+                    succeeded = True
                 except Exception as e:
                     print(f"Error running task '{name}': {e}")
                 finally:
                     # Save auth state after each task
-                    if auth_manager_config.get('save_auth_state', False):
+                    if save_auth_state and task_context:
                         try:
-                            await browser_manager.auth_manager.save_auth_state(browser_context, "google")
+                            await browser_manager.auth_manager.save_auth_state(task_context, "google")
                         except Exception as e:
                             print(f"Warning: Failed to save auth state: {e}")
                     
                     # Clean up agent resources
-                    try:
-                        await agent.close()
-                    except Exception as e:
-                        print(f"Warning: Failed to close agent: {e}")
+                    if agent:
+                        try:
+                            await agent.close()
+                        except Exception as e:
+                            print(f"Warning: Failed to close agent: {e}")
+                    
+                    if task_context and task_context is not browser_context:
+                        try:
+                            await task_context.close()
+                        except Exception as e:
+                            print(f"Warning: Failed to close task context: {e}")
+            return name, succeeded
+        
+        # Report each task as soon as it finishes instead of waiting for the slowest one
+        pending = [asyncio.create_task(run_one(task_count, name, task)) for task_count, (name, task) in enumerate(tasks, 1)]
+        for completed, finished in enumerate(asyncio.as_completed(pending), 1):
+            name, succeeded = await finished
+            print(f"Progress: {completed}/{len(tasks)} tasks finished ({'done' if succeeded else 'failed'}: {name})")
     
     finally:
         # Ensure proper cleanup of browser resources
@@ -1,13 +1,21 @@
 # setup_test_env.py
+import argparse
 import asyncio
+import json
 from auth_manager import SecureAuthManager
 import getpass
 
-async def setup_test_accounts():
+async def setup_test_accounts(credentials: dict | None = None):
     """One-time setup for test accounts"""
     
     auth_manager = SecureAuthManager("test_profile")
     
+    # Non-interactive setup: credentials maps site -> [username, password]
+    if credentials:
+        auth_manager.store_test_credentials_bulk(credentials)
+        print(f"Stored test accounts for {', '.join(credentials)}")
+        return
+    
     print("Setting up test accounts...")
     print("Please use dedicated test accounts, NOT your personal accounts!")
     print("-" * 50)
@@ -41,4 +49,13 @@ async def setup_test_accounts():
     print("Remember to enable 2FA on these accounts for extra security.")
 
 if __name__ == "__main__":
-    asyncio.run(setup_test_accounts())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Store test account credentials in the keyring")
+    parser.add_argument("--manifest", help='JSON file of {"site": ["username", "password"], ...} to store without prompting')
+    args = parser.parse_args()
+    
+    # Read the manifest before entering the event loop rather than blocking it with file IO
+    credentials = None
+    if args.manifest:
+        with open(args.manifest, "r") as f:
+            credentials = json.load(f)
+    asyncio.run(setup_test_accounts(credentials))
\ No newline at end of file
@@ -4,50 +4,97 @@ Test script to verify dynamic LLM provider switching
 """
 
 import os
-import yaml
-from dotenv import load_dotenv
-from langchain_anthropic import ChatAnthropic
-from langchain_openai import ChatOpenAI
+import json
+import asyncio
+import hashlib
+import shelve
+import sys
+from functools import lru_cache
+import httpx
+from env import ensure_env
+from llm_factory import create_llm as _create_llm, load_config
+
+# One keep-alive connection pool shared by every OpenAI client created here. ChatAnthropic has no
+# client hook, but langchain-anthropic already reuses a process-wide cached httpx client.
+_HTTP_ASYNC_CLIENT = httpx.AsyncClient(
+    limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+    timeout=httpx.Timeout(60.0),
+)
 
 def create_llm(llm_config):
-    """Create LLM instance based on provider configuration"""
-    provider = llm_config.get('provider', 'openai').lower()
-    model = llm_config['model']
-    
-    # Common LLM parameters
-    common_params = {
-        'temperature': llm_config.get('temperature', 0.0),
-        'max_tokens': llm_config.get('max_tokens', None),
-    }
+    """Create LLM instance through the shared factory used by main.py"""
+    return _cached_llm(
+        llm_config.get('provider', 'openai').lower(),
+        llm_config['model'],
+        llm_config.get('temperature', 0.0),
+        llm_config.get('max_tokens', None),
+    )
+
+@lru_cache(maxsize=8)
+def _cached_llm(provider, model, temperature, max_tokens):
+    """Build the LLM for a (provider, model, temperature, max_tokens) key, reusing earlier instances"""
+    llm_config = {'provider': provider, 'model': model, 'temperature': temperature, 'max_tokens': max_tokens}
+    return _create_llm(llm_config, http_async_client=_HTTP_ASYNC_CLIENT)
+
+# Maximum number of probe prompts in flight per provider
+PROBE_CONCURRENCY = 8
+
+# Probe conversations sent to every provider; built once since invoke doesn't mutate them
+_PROBE_MSGS = [
+    [{"role": "user", "content": "What is 2+2? Answer with just the number."}],
+]
+
+def _provider_api_errors():
+    """API error base classes of the provider SDKs that the chat model classes have imported"""
+    return tuple(sys.modules[name].APIError for name in ('openai', 'anthropic') if name in sys.modules)
+
+async def _ask_all(llm, messages_list):
+    """Send several prompts to one LLM concurrently, returning responses in order"""
+    try:
+        return await llm.abatch(messages_list, config={"max_concurrency": PROBE_CONCURRENCY})
+    except _provider_api_errors():
+        # The provider itself rejected the requests (auth, quota, bad model...); re-sending every
+        # prompt through ainvoke would only repeat the failure and double the spend
+        raise
+    except Exception as e:
+        # abatch has been unreliable for some providers; fall back to a manual bounded fan-out
+        print(f"abatch failed ({type(e).__name__}: {e}), retrying prompts individually")
+        semaphore = asyncio.Semaphore(PROBE_CONCURRENCY)
+
+        async def ask(messages):
+            async with semaphore:
+                return await llm.ainvoke(messages)
+
+        return await asyncio.gather(*(ask(messages) for messages in messages_list))
+
+# On-disk cache of probe responses keyed by (provider, model, prompt hash), so repeated runs skip
+# the network; set LLM_PROBE_NO_CACHE=1 to always call the providers
+_PROBE_CACHE_PATH = '.llm_probe_cache'
+_PROBE_MSGS_HASH = hashlib.sha256(json.dumps(_PROBE_MSGS, sort_keys=True).encode()).hexdigest()
+
+async def _probe(config):
+    """Create the LLM for a config and send it the probe messages"""
+    llm = create_llm(config)
+    use_cache = not os.environ.get('LLM_PROBE_NO_CACHE')
+    cache_key = f"{config['provider']}:{config['model']}:{_PROBE_MSGS_HASH}"
     
-    if provider == 'anthropic':
-        # Check for Anthropic API key
-        if not os.getenv('ANTHROPIC_API_KEY'):
-            raise ValueError("ANTHROPIC_API_KEY environment variable is required for Anthropic provider")
-        
-        anthropic_params = {
-            'model': model,
-            **common_params
-        }
-        return ChatAnthropic(**anthropic_params)
+    if use_cache:
+        with shelve.open(_PROBE_CACHE_PATH) as cache:
+            cached = cache.get(cache_key)
+        if cached is not None:
+            return type(llm).__name__, cached, True
     
-    elif provider == 'openai':
-        # Check for OpenAI API key
-        if not os.getenv('OPENAI_API_KEY'):
-            raise ValueError("OPENAI_API_KEY environment variable is required for OpenAI provider")
-        
-        openai_params = {
-            'model': model,
-            **common_params
-        }
-        return ChatOpenAI(**openai_params)
+    responses = await _ask_all(llm, _PROBE_MSGS)
+    contents = [response.content.strip() for response in responses]
     
-    else:
-        raise ValueError(f"Unsupported LLM provider: {provider}. Supported providers: 'anthropic', 'openai'")
+    if use_cache:
+        with shelve.open(_PROBE_CACHE_PATH) as cache:
+            cache[cache_key] = contents
+    return type(llm).__name__, contents, False
 
-def test_provider_switching():
+async def test_provider_switching():
     """Test switching between different LLM providers"""
-    load_dotenv()
+    ensure_env()
     
     # Test configurations
     test_configs = [
@@ -63,28 +110,27 @@ def test_provider_switching():
         }
     ]
     
-    for config in test_configs:
-        try:
-            print(f"\n--- Testing {config['provider'].upper()} provider ---")
-            print(f"Model: {config['model']}")
-            
-            llm = create_llm(config)
-            print(f"✅ Successfully created {type(llm).__name__} instance")
-            
-            # Test with a simple message
-            test_message = "What is 2+2? Answer with just the number."
-            response = llm.invoke([{"role": "user", "content": test_message}])
-            print(f"✅ Test response: {response.content.strip()}")
-            
-        except Exception as e:
-            print(f"❌ Error with {config['provider']} provider: {str(e)}")
+    # Probe all providers concurrently, then report in config order
+    results = await asyncio.gather(*(_probe(config) for config in test_configs), return_exceptions=True)
+    
+    for config, result in zip(test_configs, results):
+        print(f"\n--- Testing {config['provider'].upper()} provider ---")
+        print(f"Model: {config['model']}")
+        
+        if isinstance(result, Exception):
+            print(f"❌ Error with {config['provider']} provider: {str(result)}")
+            continue
+        
+        llm_name, contents, cached = result
+        print(f"✅ Successfully created {llm_name} instance")
+        for content in contents:
+            print(f"✅ Test response{' (cached)' if cached else ''}: {content}")
 
 def test_config_file():
     """Test loading configuration from YAML file"""
     try:
         print("\n--- Testing configuration file loading ---")
-        with open('configs/config.yaml', 'r') as f:
-            config_data = yaml.safe_load(f)
+        config_data = load_config()
         
         llm_config = config_data['llm']
         print(f"Provider: {llm_config['provider']}")
@@ -102,8 +148,15 @@ if __name__ == "__main__":
     print("🧪 Testing LLM Provider Switching")
     print("=" * 50)
     
+    async def run_async_tests():
+        try:
+            await test_provider_switching()
+        finally:
+            # Close the shared pool on the loop that opened its connections
+            await _HTTP_ASYNC_CLIENT.aclose()
+    
     test_config_file()
-    test_provider_switching()
+    asyncio.run(run_async_tests())
     
     print("\n" + "=" * 50)
     print("✅ Test completed!") 
\ No newline at end of file
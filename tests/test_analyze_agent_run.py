@@ -0,0 +1,83 @@
+import pytest
+
+from analyze_agent_run import AgentRunAnalyzer
+
+FIXTURE_LOG = """\
+INFO     [agent] 🚀 Starting task: Find a coffee mug and add it to the cart
+📍 Step 1
+INFO     [agent] 👍 Eval: Success - Homepage loaded
+INFO     [agent] 🤷 Eval: Unknown - second evaluation is ignored
+INFO     [agent] 🎯 Next goal: Search for a coffee mug
+INFO     [agent] 🎯 Next goal: Only the first goal is kept
+INFO     [agent] 🛠️  Action 1/2: {"input_text": {"index": 3, "text": "coffee mug"}}
+INFO     [agent] 🛠️  Action 2/2: {"click_element": {"index": 4}}
+📍 Step two
+INFO     [agent] 🎯 Next goal: Not a new step either
+📍 Step 2
+INFO     [agent] 👎 Eval: Failed - Search returned no results
+INFO     [agent] 🎯 Next goal: Open the first product
+INFO     [agent] 🛠️  Action 1/1: {"click_element": {"index": 7}}
+📍 Step 3
+INFO     [agent] 🎯 Next goal: Add the mug to the cart
+INFO     [agent] 🛠️  Action 1/1: {"click_element": {"index": 12}}
+"""
+
+
+@pytest.fixture
+def analyzer(tmp_path, monkeypatch):
+	"""Analyzer for a small fixture log, with a screenshot saved for step 1 and step 3 only"""
+	monkeypatch.chdir(tmp_path)
+	(tmp_path / 'agent_logs').mkdir()
+	log_file = tmp_path / 'agent_logs' / 'agent_run_Mug Test.log'
+	log_file.write_text(FIXTURE_LOG, encoding='utf-8')
+
+	screenshot_dir = tmp_path / 'agent_screenshots' / 'agent_screenshots_Mug_Test'
+	screenshot_dir.mkdir(parents=True)
+	(screenshot_dir / 'step_001.png').write_bytes(b'')
+	(screenshot_dir / 'step_003.png').write_bytes(b'')
+
+	return AgentRunAnalyzer('agent_logs/agent_run_Mug Test.log')
+
+
+def test_task_is_extracted(analyzer):
+	"""Test that the task is read from the first Starting task line"""
+	assert analyzer.task == 'Find a coffee mug and add it to the cart'
+
+
+def test_steps_keep_first_eval_goal_and_action(analyzer):
+	"""Test that each step keeps only its first evaluation, goal and action"""
+	assert [step['step_number'] for step in analyzer.steps] == [1, 2, 3]
+
+	first = analyzer.steps[0]
+	assert first['evaluation'] == 'Success - Homepage loaded'
+	assert first['next_goal'] == 'Search for a coffee mug'
+	assert first['action'] == '{"input_text": {"index": 3, "text": "coffee mug"}}'
+
+	second = analyzer.steps[1]
+	assert second['evaluation'] == 'Failed - Search returned no results'
+	assert second['next_goal'] == 'Open the first product'
+
+
+def test_non_numeric_step_line_is_ignored(analyzer):
+	"""Test that a Step line without a number neither starts a step nor ends the current one"""
+	assert len(analyzer.steps) == 3
+	assert analyzer.steps[0]['next_goal'] == 'Search for a coffee mug'
+
+
+def test_trailing_step_without_eval_is_unknown(analyzer):
+	"""Test that the last step is flushed at EOF and defaults its evaluation to Unknown"""
+	last = analyzer.steps[-1]
+	assert last['step_number'] == 3
+	assert last['evaluation'] == 'Unknown'
+	assert last['next_goal'] == 'Add the mug to the cart'
+	assert last['action'] == '{"click_element": {"index": 12}}'
+
+
+def test_screenshots_are_mapped_to_existing_files(analyzer):
+	"""Test that steps only get a screenshot path when the file exists in the screenshot directory"""
+	screenshot_paths = [step['screenshot_path'] for step in analyzer.steps]
+	assert screenshot_paths == [
+		'agent_screenshots/agent_screenshots_Mug_Test/step_001.png',
+		None,
+		'agent_screenshots/agent_screenshots_Mug_Test/step_003.png',
+	]
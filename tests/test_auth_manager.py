@@ -0,0 +1,65 @@
+import time
+
+import orjson
+import pytest
+from cryptography.fernet import Fernet
+
+from auth_manager import _AUTH_FORMAT_AESGCM, SecureAuthManager
+
+
+class FakePlaywrightContext:
+	"""Stands in for the playwright context behind a browser_use BrowserContext"""
+
+	def __init__(self, cookies=None):
+		self._cookies = cookies or []
+		self.added_cookies = []
+
+	async def cookies(self):
+		return self._cookies
+
+	async def add_cookies(self, cookies):
+		self.added_cookies.extend(cookies)
+
+
+class FakeSession:
+	def __init__(self, cookies=None):
+		self.context = FakePlaywrightContext(cookies)
+
+
+class FakeBrowserContext:
+	def __init__(self, cookies=None):
+		self.session = FakeSession(cookies)
+
+	async def get_session(self):
+		return self.session
+
+
+@pytest.fixture
+def auth_manager(tmp_path, monkeypatch):
+	"""SecureAuthManager writing its key and auth files under a temporary directory"""
+	monkeypatch.chdir(tmp_path)
+	return SecureAuthManager('test_profile')
+
+
+async def test_save_and_load_auth_state_round_trip(auth_manager):
+	"""Test that saved auth state is written in the AES-GCM format and loads back into a fresh context"""
+	cookies = [{'name': 'SID', 'value': 'abc123', 'domain': '.google.com', 'path': '/'}]
+	await auth_manager.save_auth_state(FakeBrowserContext(cookies), 'google')
+
+	auth_file = auth_manager.auth_dir / 'google_auth.json'
+	assert auth_file.read_bytes()[:1] == _AUTH_FORMAT_AESGCM
+
+	context = FakeBrowserContext()
+	assert await auth_manager.load_auth_state(context, 'google') is True
+	assert context.session.context.added_cookies == cookies
+
+
+async def test_load_legacy_fernet_auth_state(auth_manager):
+	"""Test that auth files written by the earlier Fernet format still load with the same key file"""
+	cookies = [{'name': 'SID', 'value': 'legacy', 'domain': '.google.com', 'path': '/'}]
+	legacy = Fernet(auth_manager._get_or_create_key()).encrypt(orjson.dumps({'cookies': cookies, 'timestamp': time.time()}))
+	(auth_manager.auth_dir / 'google_auth.json').write_bytes(legacy)
+
+	context = FakeBrowserContext()
+	assert await auth_manager.load_auth_state(context, 'google') is True
+	assert context.session.context.added_cookies == cookies
@@ -0,0 +1,37 @@
+from main import _parse_tasks
+
+TASKS_FILE = """\
+# Smoke tests for the shop
+login: Log in with the test account
+
+search: Search for a coffee mug
+this line has no colon
+   # indented comment
+checkout: Buy the mug
+search: Search for a tea pot
+"""
+
+
+def test_parse_tasks(tmp_path, capsys):
+	"""Test that blank, comment and malformed lines are skipped and a repeated name keeps its last task"""
+	tasks_file = tmp_path / 'tasks.txt'
+	tasks_file.write_text(TASKS_FILE)
+
+	assert _parse_tasks(tasks_file) == [
+		('login', ' Log in with the test account'),
+		('search', ' Search for a tea pot'),
+		('checkout', ' Buy the mug'),
+	]
+
+	output = capsys.readouterr().out
+	assert 'Skipping malformed task line' in output
+	assert 'this line has no colon' in output
+	assert "Duplicate task name 'search'" in output
+
+
+def test_parse_tasks_empty_file(tmp_path):
+	"""Test that a file with only comments and blank lines yields no tasks"""
+	tasks_file = tmp_path / 'tasks.txt'
+	tasks_file.write_text('# nothing to run yet\n\n')
+
+	assert _parse_tasks(tasks_file) == []